@@ -13,10 +13,15 @@ SCRAPING_CONFIG = {
     'sort_by': 'MOST_RELEVANT',  # Sort method: MOST_RELEVANT or NEWEST
 }
 
+# Sentiment encoding for the reviews.sentiment_label smallint column —
+# fixed-width codes group and filter faster than text labels
+SENTIMENT_CODES = {'NEGATIVE': -1, 'NEUTRAL': 0, 'POSITIVE': 1}
+SENTIMENT_LABELS = {code: label for label, code in SENTIMENT_CODES.items()}
+
 # File paths
 DATA_PATHS = {
     'raw_data': 'data/raw/bank_reviews_raw.csv',
-    'cleaned_data': 'data/processed/bank_reviews_cleaned.csv'
+    'cleaned_data': 'data/processed/bank_reviews_cleaned.parquet'
 }
 
 # Database configuration
@@ -6,22 +6,42 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import DATA_PATHS
 
+# Rows scanned per chunk so peak memory stays bounded
+CHUNK_SIZE = 50_000
+
 def check_raw_data():
-    """Quick check of the scraped data"""
+    """Quick check of the scraped data without loading the full CSV"""
     print("🔍 Checking raw data quality...")
-    
-    df = pd.read_csv(DATA_PATHS['raw_data'])
-    
-    print(f"Total reviews: {len(df)}")
-    print(f"Columns: {list(df.columns)}")
+
+    path = DATA_PATHS['raw_data']
+
+    # Tiny targeted read for the sample rows (nrows/chunksize need the
+    # default C engine — the pyarrow reader doesn't support them)
+    head = pd.read_csv(path, nrows=3, usecols=['bank', 'rating', 'review_text'])
+
+    # Single bounded-memory scan for the aggregate stats
+    total = 0
+    columns = None
+    rating_counts = pd.Series(dtype='int64')
+    null_counts = pd.Series(dtype='int64')
+
+    for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+        if columns is None:
+            columns = list(chunk.columns)
+        total += len(chunk)
+        rating_counts = rating_counts.add(chunk['rating'].value_counts(), fill_value=0)
+        null_counts = null_counts.add(chunk.isnull().sum(), fill_value=0)
+
+    print(f"Total reviews: {total}")
+    print(f"Columns: {columns}")
     print(f"\nSample of reviews:")
-    print(df[['bank', 'rating', 'review_text']].head(3))
-    
+    print(head)
+
     print(f"\nRating distribution:")
-    print(df['rating'].value_counts().sort_index())
-    
+    print(rating_counts.astype(int).sort_index())
+
     print(f"\nMissing values per column:")
-    print(df.isnull().sum())
+    print(null_counts.astype(int))
 
 if __name__ == "__main__":
-    check_raw_data()
\ No newline at end of file
+    check_raw_data()
@@ -1,99 +1,172 @@
 # scripts/data_collection.py
 import sys
 import os
-import pandas as pd
-from datetime import datetime
+import csv
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the root directory to Python path so we can import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import BANK_APPS, SCRAPING_CONFIG, DATA_PATHS
 
-def scrape_bank_reviews():
+# Column order for the raw reviews CSV
+CSV_FIELDS = ['review_id', 'review_text', 'rating', 'date', 'bank', 'app_name', 'source']
+
+# Retry schedule (seconds) for transient Play Store errors
+RETRY_DELAYS = [1, 2, 4]
+
+# Reviews fetched per paged request — the Play Store endpoint accepts
+# up to ~4500 per call, so the current 400-per-bank target lands in a
+# single round-trip and the continuation loop only kicks in for
+# larger targets
+PAGE_SIZE = 4500
+
+def _fetch_page(app_id, count, continuation_token):
+    """
+    Fetch one page of reviews, retrying with exponential backoff on
+    transient Play Store errors (rate limiting / gateway hiccups).
+    Returns (reviews_batch, continuation_token).
+    """
+    from google_play_scraper import reviews, Sort
+
+    # Hoist the config lookups out of the retry/paging loop
+    lang = SCRAPING_CONFIG['language']
+    country = SCRAPING_CONFIG['country']
+
+    for attempt, delay in enumerate([0] + RETRY_DELAYS):
+        if delay:
+            print(f"  ⏳ Retry {attempt} in {delay}s...")
+            time.sleep(delay)
+        try:
+            return reviews(
+                app_id,
+                lang=lang,
+                country=country,
+                sort=Sort.MOST_RELEVANT,
+                count=count,
+                filter_score_with=None,  # Get all ratings (1-5 stars)
+                continuation_token=continuation_token
+            )
+        except Exception as e:
+            # Only retry rate-limit / gateway errors; anything else is fatal
+            if attempt < len(RETRY_DELAYS) and ('429' in str(e) or 'PlayGatewayError' in str(e)):
+                continue
+            raise
+
+def _fetch_bank_reviews(bank_name, app_id):
+    """
+    Fetch one bank's reviews, paging with the continuation token until
+    the target count is reached or the store runs out of reviews.
+    Returns a list of row dicts ready for the CSV writer.
+    """
+    from google_play_scraper import app
+
+    print(f"Scraping reviews for {bank_name} (App ID: {app_id})...")
+
+    # Try to get app info first (optional)
+    try:
+        app_info = app(app_id)
+        print(f"  App Name: {app_info.get('title', 'Unknown')}")
+    except:
+        print(f"  Could not fetch app info, but will try to scrape reviews anyway")
+
+    # Scrape reviews page by page instead of one monolithic request
+    target = SCRAPING_CONFIG['reviews_per_bank']
+    reviews_result = []
+    continuation_token = None
+
+    while len(reviews_result) < target:
+        batch, continuation_token = _fetch_page(
+            app_id,
+            count=min(PAGE_SIZE, target - len(reviews_result)),
+            continuation_token=continuation_token
+        )
+        reviews_result.extend(batch)
+        if not batch or continuation_token is None:
+            break  # No more reviews available
+
+    # Assemble rows as plain tuples in CSV_FIELDS order — no per-review
+    # dict construction, just one comprehension over the batch
+    app_name = BANK_APPS[bank_name]
+    return [
+        (
+            review['reviewId'],
+            review['content'],
+            review['score'],
+            review['at'].strftime('%Y-%m-%d'),
+            bank_name,
+            app_name,
+            'Google Play'
+        )
+        for review in reviews_result
+    ]
+
+def scrape_bank_reviews(output_file=None):
     """
     Scrape reviews for Ethiopian banking apps from Google Play Store
     Uses app IDs from config.py
+
+    The banks are independent endpoints, so they are fetched concurrently;
+    each bank's batch is streamed to the CSV as soon as it completes, so
+    only in-flight batches are held in memory.
     """
     try:
         from google_play_scraper import app, reviews, Sort
     except ImportError:
         print("Error: google-play-scraper not installed. Run: pip install google-play-scraper")
-        return []
-    
-    all_reviews = []
-    
-    for bank_name, app_id in BANK_APPS.items():
-        print(f"Scraping reviews for {bank_name} (App ID: {app_id})...")
-        
-        try:
-            # Try to get app info first (optional)
-            try:
-                app_info = app(app_id)
-                print(f"  App Name: {app_info.get('title', 'Unknown')}")
-            except:
-                print(f"  Could not fetch app info, but will try to scrape reviews anyway")
-            
-            # Scrape reviews
-            reviews_result, continuation_token = reviews(
-                app_id,
-                lang=SCRAPING_CONFIG['language'],
-                country=SCRAPING_CONFIG['country'],
-                sort=Sort.MOST_RELEVANT,
-                count=SCRAPING_CONFIG['reviews_per_bank'],
-                filter_score_with=None  # Get all ratings (1-5 stars)
-            )
-            
-            # Process and store reviews
-            for review in reviews_result:
-                all_reviews.append({
-                    'review_id': review['reviewId'],
-                    'review_text': review['content'],
-                    'rating': review['score'],
-                    'date': review['at'].strftime('%Y-%m-%d'),
-                    'bank': bank_name,
-                    'app_name': BANK_APPS[bank_name],
-                    'source': 'Google Play'
-                })
-            
-            print(f"  ✅ Collected {len(reviews_result)} reviews for {bank_name}")
-            
-            # Small delay to be respectful to servers
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"  ❌ Error scraping {bank_name}: {str(e)}")
-            continue
-    
-    return all_reviews
+        return {}
+
+    output_file = output_file or DATA_PATHS['raw_data']
 
-def save_reviews_to_csv(reviews_data, filename):
-    """Save reviews data to CSV"""
     # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
-    df = pd.DataFrame(reviews_data)
-    df.to_csv(filename, index=False)
-    print(f"✅ Saved {len(df)} reviews to {filename}")
-    return df
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    review_counts = {}
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+
+        with ThreadPoolExecutor(max_workers=len(BANK_APPS)) as executor:
+            futures = {
+                executor.submit(_fetch_bank_reviews, bank_name, app_id): bank_name
+                for bank_name, app_id in BANK_APPS.items()
+            }
+
+            for future in as_completed(futures):
+                bank_name = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"  ❌ Error scraping {bank_name}: {str(e)}")
+                    continue
+
+                # Stream this bank's batch straight to disk
+                writer.writerows(rows)
+                review_counts[bank_name] = len(rows)
+                print(f"  ✅ Collected {len(rows)} reviews for {bank_name}")
+
+    return review_counts
 
 if __name__ == "__main__":
     print("🚀 Starting Bank Reviews Scraping...")
     print("=" * 50)
-    
-    # Scrape reviews
-    reviews_data = scrape_bank_reviews()
-    
-    if reviews_data:
-        # Save to CSV using path from config
-        df = save_reviews_to_csv(reviews_data, DATA_PATHS['raw_data'])
-        
+
+    # Scrape reviews (written to CSV as each bank completes)
+    review_counts = scrape_bank_reviews()
+
+    if review_counts:
+        total = sum(review_counts.values())
+        print(f"✅ Saved {total} reviews to {DATA_PATHS['raw_data']}")
+
         # Print summary
         print("\n" + "=" * 50)
         print("📊 SCRAPING SUMMARY:")
-        print(f"Total reviews collected: {len(df)}")
+        print(f"Total reviews collected: {total}")
         print("\nReviews per bank:")
-        print(df['bank'].value_counts())
+        for bank_name, count in review_counts.items():
+            print(f"  {bank_name}: {count}")
         print(f"\nTarget: {SCRAPING_CONFIG['reviews_per_bank']} per bank")
     else:
-        print("❌ No reviews were collected. Please check the errors above.")
\ No newline at end of file
+        print("❌ No reviews were collected. Please check the errors above.")
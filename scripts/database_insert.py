@@ -2,12 +2,19 @@
 import pandas as pd
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import sys
 import os
-from tqdm import tqdm  # For progress bar
+import io
+import csv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import DATABASE_CONFIG
+from config import DATABASE_CONFIG, SENTIMENT_CODES
+from database_schema import DatabaseManager
+
+# Column order used for staging and inserting reviews
+REVIEW_COLUMNS = ('review_id', 'bank_id', 'review_text', 'rating', 'review_date',
+                  'sentiment_label', 'sentiment_score', 'themes', 'source')
 
 class DataInserter:
     def __init__(self):
@@ -20,44 +27,37 @@ class DataInserter:
         try:
             self.conn = psycopg2.connect(**self.config)
             self.cursor = self.conn.cursor()
+            # Ingest-then-verify workload: skip the per-commit WAL fsync
+            # for this session so the bulk load isn't fsync-bound
+            self.cursor.execute("SET synchronous_commit = off")
             return True
         except Exception as e:
             print(f"❌ Connection failed: {e}")
             return False
     
     def insert_banks(self, banks_data):
-        """Insert bank information into banks table"""
+        """Upsert all banks in a single round-trip and return their ids"""
         try:
-            inserted_banks = {}
-            
-            for bank_name, app_name in banks_data.items():
-                # Check if bank already exists
-                self.cursor.execute(
-                    "SELECT bank_id FROM banks WHERE bank_name = %s",
-                    (bank_name,)
-                )
-                existing = self.cursor.fetchone()
-                
-                if existing:
-                    inserted_banks[bank_name] = existing[0]
-                    print(f"  Bank '{bank_name}' already exists (ID: {existing[0]})")
-                else:
-                    # Insert new bank
-                    self.cursor.execute(
-                        """
-                        INSERT INTO banks (bank_name, app_name)
-                        VALUES (%s, %s)
-                        RETURNING bank_id
-                        """,
-                        (bank_name, app_name)
-                    )
-                    bank_id = self.cursor.fetchone()[0]
-                    inserted_banks[bank_name] = bank_id
-                    print(f"  ✅ Inserted bank '{bank_name}' (ID: {bank_id})")
-            
-            self.conn.commit()
+            # One atomic INSERT ... ON CONFLICT replaces the old per-bank
+            # SELECT-then-INSERT pair (2N round-trips, racy on reruns)
+            rows = execute_values(
+                self.cursor,
+                """
+                INSERT INTO banks (bank_name, app_name)
+                VALUES %s
+                ON CONFLICT (bank_name) DO UPDATE SET app_name = EXCLUDED.app_name
+                RETURNING bank_id, bank_name
+                """,
+                list(banks_data.items()),
+                fetch=True
+            )
+
+            inserted_banks = {bank_name: bank_id for bank_id, bank_name in rows}
+            for bank_name, bank_id in inserted_banks.items():
+                print(f"  ✅ Upserted bank '{bank_name}' (ID: {bank_id})")
+
             return inserted_banks
-            
+
         except Exception as e:
             print(f"❌ Failed to insert banks: {e}")
             self.conn.rollback()
@@ -66,120 +66,200 @@ class DataInserter:
     def insert_reviews(self, reviews_df, bank_mapping):
         """Insert reviews data into reviews table in batches"""
         try:
-            # Prepare data for insertion
-            records = []
-            for _, row in reviews_df.iterrows():
-                bank_id = bank_mapping.get(row['bank'])
-                if bank_id:
-                    records.append((
-                        row['review_id'],
-                        bank_id,
-                        row['review_text'],
-                        int(row['rating']),
-                        row['date'],
-                        row.get('sentiment_label', 'NEUTRAL'),
-                        float(row.get('sentiment_score', 0.5)),
-                        row.get('themes', ''),
-                        row.get('source', 'Google Play')
-                    ))
+            # Fill defaults once at DataFrame level (covers both missing
+            # columns and NaN cells in one vectorized pass), then zip over
+            # plain column lists — no per-row lookups or fallbacks left
+            defaults = {
+                'sentiment_label': 'NEUTRAL',
+                'sentiment_score': 0.5,
+                'themes': '',
+                'source': 'Google Play'
+            }
+            df = reviews_df.assign(**{
+                col: default for col, default in defaults.items()
+                if col not in reviews_df.columns
+            })
+            # sentiment_label arrives as a categorical from parquet, and
+            # filling a value that isn't among a categorical's categories
+            # raises — widen the defaulted columns to object first
+            for col in defaults:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype(object)
+            df = df.fillna(defaults)
+
+            records = [
+                (review_id, bank_mapping[bank], review_text, int(rating),
+                 date, SENTIMENT_CODES.get(sentiment_label, 0),
+                 float(sentiment_score), themes, source)
+                for review_id, bank, review_text, rating, date,
+                    sentiment_label, sentiment_score, themes, source
+                in zip(
+                    df['review_id'].tolist(),
+                    df['bank'].tolist(),
+                    df['review_text'].tolist(),
+                    df['rating'].tolist(),
+                    df['date'].tolist(),
+                    df['sentiment_label'].tolist(),
+                    df['sentiment_score'].tolist(),
+                    df['themes'].tolist(),
+                    df['source'].tolist()
+                )
+                if bank in bank_mapping
+            ]
             
             print(f"\n📊 Preparing to insert {len(records)} reviews...")
-            
-            # Insert in batches for performance
-            batch_size = 100
-            inserted_count = 0
-            skipped_count = 0
-            
-            with tqdm(total=len(records), desc="Inserting reviews") as pbar:
-                for i in range(0, len(records), batch_size):
-                    batch = records[i:i + batch_size]
-                    
-                    # Use executemany for batch insertion
-                    self.cursor.executemany("""
-                        INSERT INTO reviews 
-                        (review_id, bank_id, review_text, rating, review_date, 
-                         sentiment_label, sentiment_score, themes, source)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (review_id) DO NOTHING
-                    """, batch)
-                    
-                    inserted_count += self.cursor.rowcount
-                    pbar.update(len(batch))
-            
-            self.conn.commit()
-            
+
+            # Bulk load with COPY: stage into a temp table (no per-row
+            # parse or round-trip overhead), then merge into reviews so
+            # the review_id conflict handling still applies
+            cols = ', '.join(REVIEW_COLUMNS)
+            self.cursor.execute(
+                "CREATE TEMP TABLE reviews_stage "
+                "(LIKE reviews INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+            buf = io.StringIO()
+            csv.writer(buf).writerows(records)
+            buf.seek(0)
+            self.cursor.copy_expert(
+                f"COPY reviews_stage ({cols}) FROM STDIN WITH CSV", buf
+            )
+
+            self.cursor.execute(f"""
+                INSERT INTO reviews ({cols})
+                SELECT {cols} FROM reviews_stage
+                ON CONFLICT (review_id) DO NOTHING
+            """)
+            inserted_count = self.cursor.rowcount
+
             print(f"\n✅ Inserted {inserted_count} new reviews")
             print(f"⚠️  Skipped {len(records) - inserted_count} duplicate reviews")
-            
+
+            # Populate the normalized theme tables from the same records
+            self.insert_review_themes(records)
+
             return inserted_count
-            
+
         except Exception as e:
             print(f"❌ Failed to insert reviews: {e}")
             self.conn.rollback()
             return 0
+
+    def insert_review_themes(self, records):
+        """Split each review's theme string once and populate the
+        normalized themes / review_themes tables"""
+        try:
+            themes_idx = REVIEW_COLUMNS.index('themes')
+            pairs = set()
+            for record in records:
+                review_id = record[0]
+                for theme in str(record[themes_idx]).split(','):
+                    theme = theme.strip()
+                    if theme and theme != 'Other':
+                        pairs.add((review_id, theme))
+
+            if not pairs:
+                return 0
+
+            # Upsert the theme names, then map name -> theme_id
+            theme_names = sorted({theme for _, theme in pairs})
+            execute_values(
+                self.cursor,
+                "INSERT INTO themes (name) VALUES %s ON CONFLICT (name) DO NOTHING",
+                [(name,) for name in theme_names]
+            )
+            self.cursor.execute("SELECT theme_id, name FROM themes")
+            theme_ids = {name: theme_id for theme_id, name in self.cursor.fetchall()}
+
+            execute_values(
+                self.cursor,
+                """
+                INSERT INTO review_themes (review_id, theme_id)
+                VALUES %s
+                ON CONFLICT DO NOTHING
+                """,
+                [(review_id, theme_ids[theme]) for review_id, theme in pairs]
+            )
+
+            print(f"🏷️  Linked {len(pairs)} review-theme pairs")
+            return len(pairs)
+
+        except Exception as e:
+            print(f"❌ Failed to insert review themes: {e}")
+            self.conn.rollback()
+            # The rollback undid the banks and reviews too — re-raise so
+            # insert_reviews doesn't report a count the load no longer has
+            raise
     
+    # All integrity checks in one statement: the planner shares a single
+    # scan of reviews across the UNION ALL branches and the client pays
+    # one round-trip instead of six
+    VERIFY_QUERY = """
+        WITH r AS (
+            SELECT review_id, bank_id, rating, sentiment_label, review_date
+            FROM reviews
+        )
+        SELECT 1 AS section_ord, 'Total Reviews' AS section,
+               NULL AS label, COUNT(*)::text AS value, NULL AS extra,
+               0::numeric AS sort_key
+        FROM r
+        UNION ALL
+        SELECT 2, 'Reviews per Bank', b.bank_name,
+               COUNT(r.review_id)::text, NULL, -COUNT(r.review_id)
+        FROM banks b
+        LEFT JOIN r ON b.bank_id = r.bank_id
+        GROUP BY b.bank_name
+        UNION ALL
+        SELECT 3, 'Average Rating per Bank', b.bank_name,
+               ROUND(AVG(r.rating), 2)::text,
+               COUNT(r.review_id)::text || ' reviews', -AVG(r.rating)
+        FROM banks b
+        JOIN r ON b.bank_id = r.bank_id
+        GROUP BY b.bank_name
+        UNION ALL
+        SELECT 4, 'Sentiment Distribution',
+               CASE sentiment_label WHEN 1 THEN 'POSITIVE'
+                                    WHEN -1 THEN 'NEGATIVE'
+                                    ELSE 'NEUTRAL' END,
+               COUNT(*)::text,
+               ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 1)::text || '%',
+               -COUNT(*)
+        FROM r
+        GROUP BY sentiment_label
+        UNION ALL
+        SELECT 5, 'Rating Distribution', rating::text, COUNT(*)::text,
+               ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 1)::text || '%',
+               rating
+        FROM r
+        GROUP BY rating
+        UNION ALL
+        SELECT 6, 'Date Range',
+               MIN(review_date)::text || ' to ' || MAX(review_date)::text,
+               COUNT(DISTINCT review_date)::text || ' days with reviews',
+               NULL, 0
+        FROM r
+        ORDER BY section_ord, sort_key
+    """
+
     def verify_data(self):
-        """Verify data integrity with SQL queries"""
+        """Verify data integrity with a single SQL round-trip"""
         try:
             print("\n" + "=" * 50)
             print("🔍 VERIFYING DATA INTEGRITY")
             print("=" * 50)
-            
-            queries = {
-                "Total Reviews": "SELECT COUNT(*) FROM reviews",
-                "Reviews per Bank": """
-                    SELECT b.bank_name, COUNT(r.review_id) as review_count
-                    FROM banks b
-                    LEFT JOIN reviews r ON b.bank_id = r.bank_id
-                    GROUP BY b.bank_name
-                    ORDER BY review_count DESC
-                """,
-                "Average Rating per Bank": """
-                    SELECT b.bank_name, 
-                           ROUND(AVG(r.rating), 2) as avg_rating,
-                           COUNT(r.review_id) as review_count
-                    FROM banks b
-                    JOIN reviews r ON b.bank_id = r.bank_id
-                    GROUP BY b.bank_name
-                    ORDER BY avg_rating DESC
-                """,
-                "Sentiment Distribution": """
-                    SELECT sentiment_label, COUNT(*) as count,
-                           ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 1) as percentage
-                    FROM reviews
-                    GROUP BY sentiment_label
-                    ORDER BY count DESC
-                """,
-                "Rating Distribution": """
-                    SELECT rating, COUNT(*) as count,
-                           ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 1) as percentage
-                    FROM reviews
-                    GROUP BY rating
-                    ORDER BY rating
-                """,
-                "Date Range": """
-                    SELECT MIN(review_date) as earliest, 
-                           MAX(review_date) as latest,
-                           COUNT(DISTINCT review_date) as days_with_reviews
-                    FROM reviews
-                """
-            }
-            
-            for query_name, query in queries.items():
-                print(f"\n📊 {query_name}:")
-                self.cursor.execute(query)
-                results = self.cursor.fetchall()
-                
-                if len(results[0]) == 1:
-                    # Single value result
-                    print(f"  Result: {results[0][0]}")
-                else:
-                    # Multiple columns
-                    for row in results:
-                        print(f"  {row}")
-            
+
+            self.cursor.execute(self.VERIFY_QUERY)
+
+            current_section = None
+            for _, section, label, value, extra, _ in self.cursor.fetchall():
+                if section != current_section:
+                    print(f"\n📊 {section}:")
+                    current_section = section
+                parts = [str(p) for p in (label, value, extra) if p is not None]
+                print("  " + "  ".join(parts))
+
             return True
-            
+
         except Exception as e:
             print(f"❌ Verification failed: {e}")
             return False
@@ -226,6 +306,10 @@ class DataInserter:
             print(f"❌ Failed to export schema: {e}")
             return False
     
+    def commit(self):
+        """Commit the current transaction"""
+        self.conn.commit()
+
     def close(self):
         """Close database connection"""
         if self.cursor:
@@ -239,15 +323,15 @@ def main():
     print("=" * 50)
     
     # Load the analyzed data
-    data_file = 'data/processed/reviews_with_sentiment_themes.csv'
+    data_file = 'data/processed/reviews_with_sentiment_themes.parquet'
     if not os.path.exists(data_file):
         print(f"❌ Data file not found: {data_file}")
         print("Please run sentiment and thematic analysis first.")
         return
     
     print("1. Loading analyzed data...")
-    df = pd.read_csv(data_file)
-    print(f"   Loaded {len(df)} reviews from CSV")
+    df = pd.read_parquet(data_file)
+    print(f"   Loaded {len(df)} reviews")
     
     # Create bank mapping from config
     from config import BANK_APPS
@@ -275,13 +359,22 @@ def main():
         if inserted_count == 0:
             print("❌ No reviews inserted")
             return
+
+        # The whole load (banks + reviews + themes) lands in one
+        # server-side transaction
+        inserter.commit()
+
+        # Step 3: Build indexes now that the data is in — one sequential
+        # sort per index instead of per-row maintenance during the COPY
+        print("\n4. Building indexes...")
+        DatabaseManager().create_indexes()
         
-        # Step 3: Verify data
-        print("\n4. Verifying data integrity...")
+        # Step 4: Verify data
+        print("\n5. Verifying data integrity...")
         inserter.verify_data()
         
-        # Step 4: Export schema
-        print("\n5. Exporting schema...")
+        # Step 5: Export schema
+        print("\n6. Exporting schema...")
         inserter.export_schema("database/schema.sql")
         
         print("\n" + "=" * 50)
@@ -299,13 +392,4 @@ def main():
         inserter.close()
 
 if __name__ == "__main__":
-    # Install tqdm for progress bar if not installed
-    try:
-        from tqdm import tqdm
-    except ImportError:
-        print("Installing tqdm for progress bar...")
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "tqdm"])
-        from tqdm import tqdm
-    
     main()
\ No newline at end of file
@@ -10,51 +10,103 @@ from config import DATABASE_CONFIG
 class DatabaseQueries:
     def __init__(self):
         self.config = DATABASE_CONFIG
-    
+        self.conn = None
+
+    def _get_connection(self):
+        """Open the shared connection on first use and reuse it afterwards"""
+        if self.conn is None or self.conn.closed:
+            self.conn = psycopg2.connect(**self.config)
+        return self.conn
+
     def execute_query(self, query, params=None, return_df=True):
         """Execute SQL query and return results"""
         try:
-            conn = psycopg2.connect(**self.config)
+            conn = self._get_connection()
             if return_df:
-                df = pd.read_sql_query(query, conn, params=params)
-                conn.close()
-                return df
+                return pd.read_sql_query(query, conn, params=params)
             else:
                 cursor = conn.cursor()
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                conn.close()
-                return results, columns
+                try:
+                    cursor.execute(query, params)
+                    results = cursor.fetchall()
+                    columns = [desc[0] for desc in cursor.description]
+                    return results, columns
+                finally:
+                    cursor.close()
         except Exception as e:
             print(f"❌ Query failed: {e}")
+            # Clear the aborted transaction so later queries can still
+            # use the shared connection
+            if self.conn is not None:
+                self.conn.rollback()
             return None
+
+    def close(self):
+        """Close the shared connection"""
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
+    # Both theme reports (negative pain points and 1-star themes) come
+    # from the same CTE over the normalized review_themes junction table,
+    # so themes are integer FKs — no string splitting at query time
+    THEME_INSIGHTS_QUERY = """
+        WITH exploded AS (
+            SELECT
+                b.bank_name,
+                r.rating,
+                r.sentiment_label,
+                t.name as theme
+            FROM reviews r
+            JOIN banks b ON r.bank_id = b.bank_id
+            JOIN review_themes rt ON rt.review_id = r.review_id
+            JOIN themes t ON t.theme_id = rt.theme_id
+        )
+        SELECT 'negative' as segment, bank_name, theme, COUNT(*) as complaint_count
+        FROM exploded
+        WHERE sentiment_label = -1  -- NEGATIVE, per config.SENTIMENT_CODES
+        GROUP BY bank_name, theme
+        UNION ALL
+        SELECT 'one_star', bank_name, theme, COUNT(*)
+        FROM exploded
+        WHERE rating = 1
+        GROUP BY bank_name, theme
+    """
+
     def get_business_insights(self):
         """Execute business-relevant queries"""
         print("📊 BUSINESS INSIGHTS FROM DATABASE")
         print("=" * 50)
-        
+
+        # One round-trip for both theme breakdowns, split client-side
+        themes_df = self.execute_query(self.THEME_INSIGHTS_QUERY)
+        pain_points_df = one_star_df = None
+        if themes_df is not None and not themes_df.empty:
+            pain_points_df = (
+                themes_df[themes_df['segment'] == 'negative']
+                .drop(columns='segment')
+                .sort_values(['bank_name', 'complaint_count'], ascending=[True, False])
+            )
+            one_star_df = (
+                themes_df[themes_df['segment'] == 'one_star']
+                .drop(columns='segment')
+                .rename(columns={'complaint_count': 'count'})
+                .sort_values('count', ascending=False)
+                .head(10)
+            )
+
         queries = {
-            "1. Top Pain Points by Bank": """
-                SELECT 
-                    b.bank_name,
-                    UNNEST(STRING_TO_ARRAY(r.themes, ', ')) as theme,
-                    COUNT(*) as complaint_count
-                FROM reviews r
-                JOIN banks b ON r.bank_id = b.bank_id
-                WHERE r.sentiment_label = 'NEGATIVE'
-                    AND r.themes != 'Other'
-                    AND r.themes != ''
-                GROUP BY b.bank_name, theme
-                ORDER BY b.bank_name, complaint_count DESC
-            """,
-            
             "2. Monthly Sentiment Trends": """
                 SELECT 
                     b.bank_name,
                     DATE_TRUNC('month', r.review_date) as month,
-                    AVG(CASE WHEN r.sentiment_label = 'POSITIVE' THEN 1 ELSE 0 END) * 100 as positive_percentage,
+                    AVG(CASE WHEN r.sentiment_label = 1 THEN 1 ELSE 0 END) * 100 as positive_percentage,
                     COUNT(*) as review_count
                 FROM reviews r
                 JOIN banks b ON r.bank_id = b.bank_id
@@ -65,7 +117,9 @@ class DatabaseQueries:
             "3. Rating vs Sentiment Analysis": """
                 SELECT 
                     r.rating,
-                    r.sentiment_label,
+                    CASE r.sentiment_label WHEN 1 THEN 'POSITIVE'
+                                           WHEN -1 THEN 'NEGATIVE'
+                                           ELSE 'NEUTRAL' END as sentiment_label,
                     COUNT(*) as count,
                     ROUND(AVG(r.sentiment_score), 3) as avg_confidence
                 FROM reviews r
@@ -73,27 +127,12 @@ class DatabaseQueries:
                 ORDER BY r.rating, r.sentiment_label
             """,
             
-            "4. Most Common Themes in 1-Star Reviews": """
-                SELECT 
-                    b.bank_name,
-                    UNNEST(STRING_TO_ARRAY(r.themes, ', ')) as theme,
-                    COUNT(*) as count
-                FROM reviews r
-                JOIN banks b ON r.bank_id = b.bank_id
-                WHERE r.rating = 1
-                    AND r.themes != 'Other'
-                    AND r.themes != ''
-                GROUP BY b.bank_name, theme
-                ORDER BY count DESC
-                LIMIT 10
-            """,
-            
             "5. Bank Performance Comparison": """
                 SELECT 
                     b.bank_name,
                     COUNT(r.review_id) as total_reviews,
                     ROUND(AVG(r.rating), 2) as avg_rating,
-                    ROUND(AVG(CASE WHEN r.sentiment_label = 'POSITIVE' THEN 1 ELSE 0 END) * 100, 1) as positive_percentage,
+                    ROUND(AVG(CASE WHEN r.sentiment_label = 1 THEN 1 ELSE 0 END) * 100, 1) as positive_percentage,
                     ROUND(AVG(r.sentiment_score), 3) as avg_sentiment_confidence
                 FROM banks b
                 LEFT JOIN reviews r ON b.bank_id = r.bank_id
@@ -102,9 +141,16 @@ class DatabaseQueries:
             """
         }
         
-        for name, query in queries.items():
+        sections = [
+            ("1. Top Pain Points by Bank", pain_points_df),
+            ("2. Monthly Sentiment Trends", self.execute_query(queries["2. Monthly Sentiment Trends"])),
+            ("3. Rating vs Sentiment Analysis", self.execute_query(queries["3. Rating vs Sentiment Analysis"])),
+            ("4. Most Common Themes in 1-Star Reviews", one_star_df),
+            ("5. Bank Performance Comparison", self.execute_query(queries["5. Bank Performance Comparison"])),
+        ]
+
+        for name, df in sections:
             print(f"\n{name}:")
-            df = self.execute_query(query)
             if df is not None and not df.empty:
                 print(df.to_string(index=False))
             print("-" * 50)
@@ -113,18 +159,17 @@ def main():
     """Run business insights queries"""
     print("🚀 Running Business Intelligence Queries...")
     
-    db_queries = DatabaseQueries()
-    
-    # Test connection
-    test_df = db_queries.execute_query("SELECT COUNT(*) as total_reviews FROM reviews")
-    if test_df is not None:
-        print(f"✅ Database connection successful")
-        print(f"📊 Total reviews in database: {test_df.iloc[0]['total_reviews']}")
-        
-        # Run business insights
-        db_queries.get_business_insights()
-    else:
-        print("❌ Failed to connect to database")
+    with DatabaseQueries() as db_queries:
+        # Test connection
+        test_df = db_queries.execute_query("SELECT COUNT(*) as total_reviews FROM reviews")
+        if test_df is not None:
+            print(f"✅ Database connection successful")
+            print(f"📊 Total reviews in database: {test_df.iloc[0]['total_reviews']}")
+
+            # Run business insights
+            db_queries.get_business_insights()
+        else:
+            print("❌ Failed to connect to database")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
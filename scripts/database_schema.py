@@ -1,6 +1,16 @@
-import psycopg2
-from psycopg2 import sql
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+# psycopg3 preferred: automatic prepared statements, binary wire
+# protocol and native COPY. Fall back to psycopg2 where only that is
+# installed.
+try:
+    import psycopg
+    from psycopg import sql
+    PSYCOPG3 = True
+except ImportError:
+    import psycopg2 as psycopg
+    from psycopg2 import sql
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+    from psycopg2.extras import execute_values
+    PSYCOPG3 = False
 import sys
 import os
 
@@ -15,9 +25,19 @@ class DatabaseManager:
         self.cursor = None
     
     def connect(self):
-        """Establish database connection"""
+        """Establish the database connection, reusing an open one.
+
+        Methods borrow this shared connection instead of paying a fresh
+        TCP + auth handshake each call; close() releases it when the
+        caller is done."""
+        if self.conn is not None and not self.conn.closed:
+            return True
         try:
-            self.conn = psycopg2.connect(**self.config)
+            if PSYCOPG3:
+                # Statements repeated 5+ times get server-side prepared
+                self.conn = psycopg.connect(**self.config, prepare_threshold=5)
+            else:
+                self.conn = psycopg.connect(**self.config)
             self.cursor = self.conn.cursor()
             print("✅ Connected to PostgreSQL database!")
             return True
@@ -29,9 +49,11 @@ class DatabaseManager:
         """Close database connection"""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
             self.conn.close()
-        print("Database connection closed.")
+            self.conn = None
+            print("Database connection closed.")
     
     def create_database(self):
         """Create database if it doesn't exist"""
@@ -40,8 +62,11 @@ class DatabaseManager:
         temp_config['dbname'] = 'postgres'
         
         try:
-            conn = psycopg2.connect(**temp_config)
-            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            if PSYCOPG3:
+                conn = psycopg.connect(**temp_config, autocommit=True)
+            else:
+                conn = psycopg.connect(**temp_config)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
             cursor = conn.cursor()
             
             # Check if database exists
@@ -65,7 +90,9 @@ class DatabaseManager:
             return False
     
     def create_tables(self):
-        """Create Banks and Reviews tables"""
+        """Create Banks and Reviews tables (indexes are deferred to
+        create_indexes so a following bulk load doesn't pay per-row
+        index maintenance)"""
         if not self.connect():
             return False
         
@@ -88,7 +115,8 @@ class DatabaseManager:
                     review_text TEXT NOT NULL,
                     rating INTEGER CHECK (rating >= 1 AND rating <= 5),
                     review_date DATE,
-                    sentiment_label VARCHAR(10),
+                    -- Encoded per config.SENTIMENT_CODES (-1/0/1)
+                    sentiment_label SMALLINT DEFAULT 0,
                     sentiment_score DECIMAL(5,4),
                     themes TEXT,
                     source VARCHAR(50),
@@ -98,12 +126,22 @@ class DatabaseManager:
                 )
             """)
             
-            # Create indexes for performance
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_bank_id ON reviews(bank_id)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment_label)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews(review_date)")
-            
+            # Create normalized theme tables — themes are split once at
+            # ingest instead of STRING_TO_ARRAY/UNNEST on every query
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS themes (
+                    theme_id SERIAL PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS review_themes (
+                    review_id VARCHAR(100) REFERENCES reviews(review_id) ON DELETE CASCADE,
+                    theme_id INTEGER REFERENCES themes(theme_id) ON DELETE CASCADE,
+                    PRIMARY KEY (review_id, theme_id)
+                )
+            """)
+
             self.conn.commit()
             print("✅ Tables created successfully!")
             return True
@@ -112,9 +150,106 @@ class DatabaseManager:
             print(f"❌ Failed to create tables: {e}")
             self.conn.rollback()
             return False
-        finally:
-            self.close()
     
+    def create_indexes(self, concurrently=False):
+        """Create the reviews indexes and refresh planner stats.
+
+        Run after the bulk load: building each B-tree in one sequential
+        sort is much cheaper than maintaining it row by row during the
+        COPY. concurrently=True avoids locking the table on reruns."""
+        if not self.connect():
+            return False
+
+        keyword = "CONCURRENTLY " if concurrently else ""
+        statements = [
+            f"CREATE INDEX {keyword}IF NOT EXISTS idx_reviews_bank_id ON reviews(bank_id)",
+            f"CREATE INDEX {keyword}IF NOT EXISTS idx_reviews_rating ON reviews(rating)",
+            f"CREATE INDEX {keyword}IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment_label)",
+            f"CREATE INDEX {keyword}IF NOT EXISTS idx_reviews_date ON reviews(review_date)",
+            # Covering indexes for the hot query shapes: per-bank monthly
+            # trends and sentiment-filtered per-bank aggregates
+            f"CREATE INDEX {keyword}IF NOT EXISTS reviews_bank_date_idx ON reviews(bank_id, review_date)",
+            f"""
+                CREATE INDEX {keyword}IF NOT EXISTS reviews_sent_bank_idx
+                ON reviews(sentiment_label, bank_id)
+                WHERE sentiment_label <> 0
+            """,
+        ]
+
+        try:
+            if concurrently:
+                # CREATE INDEX CONCURRENTLY refuses to run in a transaction
+                self.conn.autocommit = True
+
+            for statement in statements:
+                self.cursor.execute(statement)
+            # Refresh planner statistics now that the table is populated
+            self.cursor.execute("ANALYZE reviews")
+
+            if not concurrently:
+                self.conn.commit()
+            print("✅ Indexes created and statistics refreshed!")
+            return True
+
+        except Exception as e:
+            print(f"❌ Failed to create indexes: {e}")
+            if not concurrently:
+                self.conn.rollback()
+            return False
+        finally:
+            if concurrently:
+                # Hand the shared connection back in transactional mode
+                self.conn.autocommit = False
+
+    def bulk_insert_reviews(self, rows):
+        """Bulk-load review row tuples. On psycopg3 this streams rows over
+        the COPY protocol into a temp staging table (one stream instead of
+        per-row round-trips) and merges with ON CONFLICT DO NOTHING; on
+        psycopg2 it falls back to execute_values, one multi-row INSERT per
+        1000 rows. Both arms skip duplicate review_ids the same way."""
+        if not self.connect():
+            return 0
+
+        columns = ("review_id, bank_id, review_text, rating, review_date, "
+                   "sentiment_label, sentiment_score, themes, source")
+        try:
+            if PSYCOPG3:
+                # Text-format COPY: the adapter renders each Python value,
+                # so there is no strict binary OID matching to trip over,
+                # and staging keeps duplicate handling identical to the
+                # psycopg2 arm instead of aborting on a unique violation
+                self.cursor.execute(
+                    "CREATE TEMP TABLE reviews_stage "
+                    "(LIKE reviews INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                with self.cursor.copy(
+                    f"COPY reviews_stage ({columns}) FROM STDIN"
+                ) as cp:
+                    for row in rows:
+                        cp.write_row(row)
+                self.cursor.execute(
+                    f"INSERT INTO reviews ({columns}) "
+                    f"SELECT {columns} FROM reviews_stage "
+                    "ON CONFLICT (review_id) DO NOTHING"
+                )
+            else:
+                execute_values(
+                    self.cursor,
+                    f"INSERT INTO reviews ({columns}) VALUES %s "
+                    "ON CONFLICT (review_id) DO NOTHING",
+                    rows,
+                    page_size=1000
+                )
+
+            self.conn.commit()
+            print(f"✅ Bulk-loaded {len(rows)} reviews")
+            return len(rows)
+
+        except Exception as e:
+            print(f"❌ Bulk insert failed: {e}")
+            self.conn.rollback()
+            return 0
+
     def get_schema_info(self):
         """Get information about the database schema"""
         if not self.connect():
@@ -150,8 +285,6 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error getting schema: {e}")
             return None
-        finally:
-            self.close()
 
 def main():
     """Main function to setup database"""
@@ -160,17 +293,25 @@ def main():
     
     db = DatabaseManager()
     
-    # Step 1: Create database
-    print("\n1. Creating database...")
-    db.create_database()
-    
-    # Step 2: Create tables
-    print("\n2. Creating tables...")
-    db.create_tables()
-    
-    # Step 3: Show schema
-    print("\n3. Database schema:")
-    db.get_schema_info()
+    try:
+        # Step 1: Create database
+        print("\n1. Creating database...")
+        db.create_database()
+        
+        # Step 2: Create tables
+        print("\n2. Creating tables...")
+        db.create_tables()
+        
+        # Step 3: Create indexes (no-op on tables already indexed; after a
+        # fresh bulk load run this step last instead)
+        print("\n3. Creating indexes...")
+        db.create_indexes()
+        
+        # Step 4: Show schema
+        print("\n4. Database schema:")
+        db.get_schema_info()
+    finally:
+        db.close()
     
     print("\n✅ Database setup completed!")
 
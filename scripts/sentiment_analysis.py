@@ -9,48 +9,129 @@ import torch
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import DATA_PATHS
 
+# torch can undersubscribe CPU cores by default; claim them all for
+# the compute-bound inference loop
+torch.set_num_threads(os.cpu_count())
+
 class SentimentAnalyzer:
     def __init__(self):
         """Initialize the sentiment analysis pipeline with DistilBERT"""
         print("🔄 Loading DistilBERT sentiment model...")
         self.model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-        self.sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model=self.model_name,
-            tokenizer=self.model_name,
-            truncation=True,
-            max_length=512
+        self.device = 0 if torch.cuda.is_available() else -1
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+
+        # Optional ONNX Runtime backend (SENT_BACKEND=ort): graph fusions
+        # beat eager PyTorch on both CPU and GPU. Falls back to PyTorch
+        # if optimum isn't installed.
+        self.backend = 'torch'
+        model = None
+        if os.environ.get('SENT_BACKEND') == 'ort':
+            model = self._load_ort_model()
+
+        if model is not None:
+            self.backend = 'ort'
+            self.sentiment_pipeline = pipeline(
+                "sentiment-analysis",
+                model=model,
+                tokenizer=tokenizer,
+                truncation=True,
+                max_length=512
+            )
+        else:
+            if self.device >= 0:
+                # FP16 weights on GPU: halves weight bandwidth and lets the
+                # matmuls run on Tensor Cores
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    self.model_name, torch_dtype=torch.float16
+                ).to('cuda').eval()
+            else:
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    self.model_name
+                ).eval()
+                # Dynamic int8 quantization on CPU: the dominant Linear
+                # matmuls run on int8 kernels with ~4x the ALU throughput
+                # and a quarter of the weight bandwidth of FP32
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+            self.sentiment_pipeline = pipeline(
+                "sentiment-analysis",
+                model=model,
+                tokenizer=tokenizer,
+                device=self.device,
+                truncation=True,
+                max_length=512
+            )
+
+        print(f"✅ Sentiment model loaded successfully! "
+              f"(backend: {self.backend}, "
+              f"device: {'cuda' if self.device >= 0 else 'cpu'})")
+
+    def _load_ort_model(self):
+        """Export DistilBERT to ONNX Runtime; returns None if optimum is missing"""
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError:
+            print("⚠️  optimum[onnxruntime] not installed, falling back to PyTorch")
+            return None
+
+        provider = ('CUDAExecutionProvider' if self.device >= 0
+                    else 'CPUExecutionProvider')
+        print(f"  Exporting to ONNX Runtime ({provider})...")
+        return ORTModelForSequenceClassification.from_pretrained(
+            self.model_name, export=True, provider=provider
         )
-        print("✅ Sentiment model loaded successfully!")
-    
-    def analyze_sentiment_batch(self, texts):
+
+    def analyze_sentiment_batch(self, texts, batch_size=None):
         """Analyze sentiment for a batch of texts"""
         try:
-            results = self.sentiment_pipeline(texts)
+            with torch.inference_mode():
+                if self.backend == 'torch' and self.device >= 0:
+                    with torch.autocast('cuda', dtype=torch.float16):
+                        results = self.sentiment_pipeline(texts, batch_size=batch_size)
+                else:
+                    results = self.sentiment_pipeline(texts, batch_size=batch_size)
             return results
         except Exception as e:
             print(f"Error in sentiment analysis: {e}")
             return [{"label": "NEUTRAL", "score": 0.0}] * len(texts)
-    
-    def analyze_reviews(self, df, batch_size=32):
-        """Analyze sentiment for all reviews in batches"""
+
+    def analyze_reviews(self, df, batch_size=128):
+        """Analyze sentiment for all reviews in length-bucketed batches"""
         print(f"🔍 Analyzing sentiment for {len(df)} reviews...")
-        
-        sentiments = []
-        confidence_scores = []
-        
+
+        texts = df['review_text'].tolist()
+
+        # Batches are padded to their longest member, so one long review
+        # inflates the FLOPs of everything batched with it. Sort by token
+        # length first so each batch pads to a near-uniform length, then
+        # scatter results back into source order.
+        tokenizer = self.sentiment_pipeline.tokenizer
+        lengths = [
+            len(ids) for ids in
+            tokenizer(texts, truncation=True, max_length=512)['input_ids']
+        ]
+        order = np.argsort(lengths, kind='stable')
+
+        sentiments = [None] * len(texts)
+        confidence_scores = [0.0] * len(texts)
+
         # Process in batches to avoid memory issues
-        for i in range(0, len(df), batch_size):
-            batch_texts = df['review_text'].iloc[i:i+batch_size].tolist()
-            batch_results = self.analyze_sentiment_batch(batch_texts)
-            
-            for result in batch_results:
-                sentiments.append(result['label'])
-                confidence_scores.append(result['score'])
-            
+        for i in range(0, len(order), batch_size):
+            batch_idx = order[i:i+batch_size]
+            batch_texts = [texts[j] for j in batch_idx]
+            batch_results = self.analyze_sentiment_batch(batch_texts, batch_size=batch_size)
+
+            for j, result in zip(batch_idx, batch_results):
+                sentiments[j] = result['label']
+                confidence_scores[j] = result['score']
+
             if (i // batch_size) % 10 == 0:  # Progress update every 10 batches
-                print(f"   Processed {min(i + batch_size, len(df))}/{len(df)} reviews")
-        
+                print(f"   Processed {min(i + batch_size, len(texts))}/{len(texts)} reviews")
+
         # Add results to dataframe
         df['sentiment_label'] = sentiments
         df['sentiment_score'] = confidence_scores
@@ -67,26 +148,42 @@ def generate_sentiment_report(df):
     print("📊 SENTIMENT ANALYSIS REPORT")
     print("="*60)
     
+    # Low-cardinality keys as categoricals: groupbys and masks compare
+    # int8 codes instead of hashing strings, and the dtype survives the
+    # parquet round-trip into the downstream scripts
+    df['bank'] = df['bank'].astype('category')
+    df['sentiment_label'] = df['sentiment_label'].astype('category')
+    
+    # One scan of the dataframe; every table below is folded from this
+    # small (bank, rating, sentiment) cube instead of its own full pass
+    g = df.groupby(['bank', 'rating', 'sentiment_label'], observed=True).agg(
+        n=('sentiment_score', 'size'),
+        score_sum=('sentiment_score', 'sum')
+    )
+    n = g['n']
+    
     # Overall sentiment distribution
     print("\nOverall Sentiment Distribution:")
-    sentiment_counts = df['sentiment_label'].value_counts()
+    sentiment_counts = n.groupby(level='sentiment_label').sum().sort_values(ascending=False)
     for sentiment, count in sentiment_counts.items():
         percentage = (count / len(df)) * 100
         print(f"  {sentiment}: {count} reviews ({percentage:.1f}%)")
     
     # Sentiment by bank
     print("\nSentiment by Bank:")
-    bank_sentiment = pd.crosstab(df['bank'], df['sentiment_label'], normalize='index') * 100
+    bank_sentiment = n.groupby(level=['bank', 'sentiment_label']).sum().unstack(fill_value=0)
+    bank_sentiment = bank_sentiment.div(bank_sentiment.sum(axis=1), axis=0) * 100
     print(bank_sentiment.round(1))
     
     # Sentiment by rating
     print("\nSentiment by Star Rating:")
-    rating_sentiment = pd.crosstab(df['rating'], df['sentiment_label'])
+    rating_sentiment = n.groupby(level=['rating', 'sentiment_label']).sum().unstack(fill_value=0)
     print(rating_sentiment)
     
     # Average sentiment score by bank
     print("\nAverage Sentiment Confidence by Bank:")
-    avg_confidence = df.groupby('bank')['sentiment_score'].mean().round(3)
+    by_bank = g.groupby(level='bank').sum()
+    avg_confidence = (by_bank['score_sum'] / by_bank['n']).round(3)
     print(avg_confidence)
     
     return df
@@ -94,7 +191,7 @@ def generate_sentiment_report(df):
 if __name__ == "__main__":
     # Load cleaned data
     print("🚀 Starting Sentiment Analysis...")
-    df = pd.read_csv(DATA_PATHS['cleaned_data'])
+    df = pd.read_parquet(DATA_PATHS['cleaned_data'])
     
     # Initialize analyzer
     analyzer = SentimentAnalyzer()
@@ -105,8 +202,9 @@ if __name__ == "__main__":
     # Generate report
     df_with_sentiment = generate_sentiment_report(df_with_sentiment)
     
-    # Save results
-    output_path = 'data/processed/reviews_with_sentiment.csv'
+    # Save results (parquet: keeps dtypes and reads back far faster
+    # than re-parsing CSV in the downstream scripts)
+    output_path = 'data/processed/reviews_with_sentiment.parquet'
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df_with_sentiment.to_csv(output_path, index=False)
+    df_with_sentiment.to_parquet(output_path, compression='zstd', index=False)
     print(f"\n💾 Results saved to: {output_path}")
\ No newline at end of file
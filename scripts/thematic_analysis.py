@@ -5,13 +5,25 @@ import re
 from collections import Counter
 import sys
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import (
+    TfidfVectorizer, HashingVectorizer, CountVectorizer, TfidfTransformer
+)
 from sklearn.feature_extraction import _stop_words
+from sklearn.pipeline import Pipeline
+
+try:
+    import ahocorasick  # pyahocorasick: single-pass keyword automaton
+except ImportError:
+    ahocorasick = None
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import BANK_APPS
 
 class ThematicAnalyzer:
+    # Above this many documents the exact TF-IDF vocabulary hash-map
+    # gets expensive; switch to the streaming hashed variant
+    HASHING_THRESHOLD = 50_000
+
     def __init__(self):
         # Expanded theme keywords based on common banking app issues
         self.theme_keywords = {
@@ -50,7 +62,40 @@ class ThematicAnalyzer:
                 'wifi', 'data', 'signal', 'server', 'maintenance', 'down'
             ]
         }
-    
+
+        # Build one Aho-Corasick automaton over every keyword so a review
+        # is scanned in a single C pass instead of ~100 regex searches.
+        # This is already the compiled hot path for categorization — a
+        # JIT-compiled byte scan (numba/cython) would only re-implement
+        # the same multi-pattern sweep with a heavier toolchain, so the
+        # fallbacks stay: automaton first, then the per-theme compiled
+        # alternations below.
+        # Keywords are padded with spaces: preprocess_text collapses the
+        # text to lowercase words separated by single spaces, so padding
+        # both sides preserves the old \b word-boundary semantics.
+        # keywords like 'update' or 'issue' belong to several themes, so
+        # each word maps to the list of themes it signals.
+        self.automaton = None
+        if ahocorasick is not None:
+            keyword_themes = {}
+            for theme, keywords in self.theme_keywords.items():
+                for keyword in keywords:
+                    keyword_themes.setdefault(f" {keyword.lower()} ", []).append(theme)
+
+            self.automaton = ahocorasick.Automaton()
+            for padded_keyword, themes in keyword_themes.items():
+                self.automaton.add_word(padded_keyword, themes)
+            self.automaton.make_automaton()
+
+        # Precompiled alternation per theme for the regex path — seven
+        # C-level searches per review instead of ~100 per-keyword ones
+        self.theme_patterns = {
+            theme: re.compile(
+                r'\b(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + r')\b'
+            )
+            for theme, keywords in self.theme_keywords.items()
+        }
+
     def preprocess_text(self, text):
         """Basic text preprocessing without spaCy"""
         if pd.isna(text):
@@ -62,24 +107,110 @@ class ThematicAnalyzer:
         text = re.sub(r'\s+', ' ', text).strip()
         return text
     
-    def extract_keywords_tfidf(self, texts, max_features=50):
-        """Extract keywords using TF-IDF"""
-        # Preprocess all texts
-        processed_texts = [self.preprocess_text(text) for text in texts]
-        
+    def build_corpus_vectorizer(self, texts, max_features=500, preprocessed=False):
+        """Fit one TF-IDF vocabulary over the whole corpus; per-subset
+        keyword extraction then only pays for transform"""
+        if preprocessed:
+            processed_texts = list(texts)
+        else:
+            processed_texts = [self.preprocess_text(text) for text in texts]
+
+        if len(processed_texts) > self.HASHING_THRESHOLD:
+            return self._build_hashing_vectorizer(processed_texts, preprocessed)
+
         vectorizer = TfidfVectorizer(
             max_features=max_features,
             stop_words='english',
+            lowercase=not preprocessed,
             ngram_range=(1, 3),  # Include single words, bigrams, and trigrams
             min_df=2  # Ignore terms that appear in only 1 document
         )
-        
         try:
-            tfidf_matrix = vectorizer.fit_transform(processed_texts)
-            feature_names = vectorizer.get_feature_names_out()
-            
-            # Get top keywords by average TF-IDF score
+            vectorizer.fit(processed_texts)
+            return vectorizer
+        except Exception as e:
+            print(f"TF-IDF error: {e}")
+            return None
+
+    def _build_hashing_vectorizer(self, processed_texts, preprocessed):
+        """Streaming TF-IDF for large corpora: HashingVectorizer never
+        builds a vocabulary dict, so fitting is a single constant-memory
+        pass. Bucket indices are mapped back to readable terms by hashing
+        a candidate vocabulary taken from a corpus sample."""
+        try:
+            pipeline = Pipeline([
+                ('hash', HashingVectorizer(
+                    n_features=2 ** 18,
+                    stop_words='english',
+                    lowercase=not preprocessed,
+                    ngram_range=(1, 3),
+                    alternate_sign=False
+                )),
+                ('tfidf', TfidfTransformer()),
+            ])
+            pipeline.fit(processed_texts)
+
+            # Candidate terms from a sample are enough to name the top
+            # buckets; each term hashes to exactly one column
+            candidates = CountVectorizer(
+                stop_words='english',
+                lowercase=not preprocessed,
+                ngram_range=(1, 3),
+                min_df=2,
+                max_features=20_000
+            ).fit(processed_texts[:10_000]).get_feature_names_out()
+
+            term_hasher = HashingVectorizer(
+                n_features=2 ** 18,
+                analyzer=lambda term: [term],
+                alternate_sign=False
+            )
+            buckets = term_hasher.transform(candidates)
+            pipeline.bucket_names_ = {
+                bucket: term for term, bucket in zip(candidates, buckets.indices)
+            }
+            return pipeline
+        except Exception as e:
+            print(f"TF-IDF error: {e}")
+            return None
+
+    def extract_keywords_tfidf(self, texts, max_features=50, vectorizer=None,
+                               preprocessed=False):
+        """Extract keywords using TF-IDF"""
+        # Preprocess all texts (skipped when the clean_text column from
+        # preprocessing is passed in)
+        if preprocessed:
+            processed_texts = list(texts)
+        else:
+            processed_texts = [self.preprocess_text(text) for text in texts]
+
+        try:
+            if vectorizer is None:
+                # No shared vocabulary available — fit on this subset
+                vectorizer = TfidfVectorizer(
+                    max_features=max_features,
+                    stop_words='english',
+                    lowercase=not preprocessed,
+                    ngram_range=(1, 3),  # Include single words, bigrams, and trigrams
+                    min_df=2  # Ignore terms that appear in only 1 document
+                )
+                tfidf_matrix = vectorizer.fit_transform(processed_texts)
+            else:
+                # Vocabulary build (the expensive part) already happened
+                tfidf_matrix = vectorizer.transform(processed_texts)
+
             scores = np.array(tfidf_matrix.mean(axis=0)).flatten()
+
+            if hasattr(vectorizer, 'bucket_names_'):
+                # Hashed path: name the top buckets via the candidate map
+                top = np.argsort(scores)[::-1][:30]
+                return [
+                    (vectorizer.bucket_names_.get(i, f'feature_{i}'), scores[i])
+                    for i in top if scores[i] > 0
+                ]
+
+            # Get top keywords by average TF-IDF score
+            feature_names = vectorizer.get_feature_names_out()
             keyword_scores = list(zip(feature_names, scores))
             keyword_scores.sort(key=lambda x: x[1], reverse=True)
             
@@ -91,19 +222,58 @@ class ThematicAnalyzer:
     def categorize_review_themes(self, review_text):
         """Categorize review into themes based on keyword matching"""
         text_lower = self.preprocess_text(review_text)
-        matched_themes = []
-        
-        for theme, keywords in self.theme_keywords.items():
-            for keyword in keywords:
-                # Use word boundaries to avoid partial matches
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, text_lower):
-                    matched_themes.append(theme)
-                    break  # Avoid duplicate themes for same review
-        
+
+        if self.automaton is not None:
+            # Single automaton pass over the padded text
+            hits = set()
+            for _, themes in self.automaton.iter(f" {text_lower} "):
+                hits.update(themes)
+            matched_themes = [theme for theme in self.theme_keywords if theme in hits]
+        else:
+            matched_themes = [
+                theme for theme, pattern in self.theme_patterns.items()
+                if pattern.search(text_lower)
+            ]
+
         return ', '.join(matched_themes) if matched_themes else 'Other'
-    
-    def analyze_bank_themes(self, df, bank_name):
+
+    def categorize_series(self, texts, preprocessed=False):
+        """Categorize a whole Series of reviews in vectorized passes"""
+        if preprocessed:
+            # Already normalized by data_preprocessing's clean_text pass
+            clean = texts.fillna('').astype(str)
+        else:
+            # One vectorized cleanup pass instead of preprocess_text per row
+            clean = (
+                texts.fillna('').astype(str).str.lower()
+                .str.replace(r'[^a-z\s]', ' ', regex=True)
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip()
+            )
+
+        if self.automaton is not None:
+            # The automaton already scans each row in a single C pass
+            theme_order = list(self.theme_keywords)
+
+            def scan(text):
+                hits = set()
+                for _, themes in self.automaton.iter(f" {text} "):
+                    hits.update(themes)
+                return ', '.join(t for t in theme_order if t in hits) or 'Other'
+
+            return clean.map(scan)
+
+        # Regex path: one str.contains pass per theme (seven passes over
+        # the column) instead of a Python call per row
+        hit_matrix = np.column_stack([
+            clean.str.contains(pattern).to_numpy()
+            for pattern in self.theme_patterns.values()
+        ])
+        theme_names = np.array(list(self.theme_patterns))
+        labels = [', '.join(theme_names[row]) or 'Other' for row in hit_matrix]
+        return pd.Series(labels, index=texts.index)
+
+    def analyze_bank_themes(self, df, bank_name, vectorizer=None):
         """Analyze themes for a specific bank"""
         bank_reviews = df[df['bank'] == bank_name]
         
@@ -122,11 +292,18 @@ class ThematicAnalyzer:
             print("No negative reviews to analyze.")
             return Counter()
         
-        # Extract themes for negative reviews
+        # The normalized column from preprocessing feeds both theme
+        # matching and TF-IDF when present
+        text_col = 'clean_text' if 'clean_text' in bank_reviews.columns else 'review_text'
+        preprocessed = text_col == 'clean_text'
+        
+        # Extract themes for negative reviews (reuse the precomputed
+        # column when the caller already categorized the whole corpus)
         print("\n🔍 Analyzing pain points...")
-        negative_reviews['themes'] = negative_reviews['review_text'].apply(
-            self.categorize_review_themes
-        )
+        if 'themes' not in negative_reviews.columns:
+            negative_reviews['themes'] = self.categorize_series(
+                negative_reviews[text_col], preprocessed=preprocessed
+            )
         
         # Count theme frequency
         all_themes = []
@@ -146,8 +323,9 @@ class ThematicAnalyzer:
         
         # Extract keywords from negative reviews
         print(f"\n🔑 TOP KEYWORDS FROM NEGATIVE REVIEWS:")
-        negative_texts = negative_reviews['review_text'].tolist()
-        top_keywords = self.extract_keywords_tfidf(negative_texts)
+        negative_texts = negative_reviews[text_col].tolist()
+        top_keywords = self.extract_keywords_tfidf(negative_texts, vectorizer=vectorizer,
+                                                   preprocessed=preprocessed)
         
         if top_keywords:
             for keyword, score in top_keywords[:10]:
@@ -158,8 +336,9 @@ class ThematicAnalyzer:
         # Analyze positive reviews for strengths
         if len(positive_reviews) > 0:
             print(f"\n⭐ POSITIVE FEEDBACK KEYWORDS:")
-            positive_texts = positive_reviews['review_text'].tolist()
-            positive_keywords = self.extract_keywords_tfidf(positive_texts)
+            positive_texts = positive_reviews[text_col].tolist()
+            positive_keywords = self.extract_keywords_tfidf(positive_texts, vectorizer=vectorizer,
+                                                            preprocessed=preprocessed)
             
             if positive_keywords:
                 for keyword, score in positive_keywords[:5]:
@@ -172,14 +351,26 @@ def generate_thematic_report(df):
     print("🚀 Starting Thematic Analysis...")
     analyzer = ThematicAnalyzer()
     
+    # Cheap no-op when the parquet input already carries category dtypes
+    df['bank'] = df['bank'].astype('category')
+    df['sentiment_label'] = df['sentiment_label'].astype('category')
+    
     print("=" * 60)
     print("📊 COMPREHENSIVE THEMATIC ANALYSIS")
     print("=" * 60)
-    
+
+    # Categorize the whole corpus once and fit the TF-IDF vocabulary
+    # once; the per-bank analysis below only filters and transforms.
+    # The clean_text column from preprocessing spares both a re-clean.
+    preprocessed = 'clean_text' in df.columns
+    texts = df['clean_text'] if preprocessed else df['review_text']
+    df['themes'] = analyzer.categorize_series(texts, preprocessed=preprocessed)
+    vectorizer = analyzer.build_corpus_vectorizer(texts, preprocessed=preprocessed)
+
     # Analyze each bank
     bank_themes = {}
     for bank in df['bank'].unique():
-        bank_themes[bank] = analyzer.analyze_bank_themes(df, bank)
+        bank_themes[bank] = analyzer.analyze_bank_themes(df, bank, vectorizer=vectorizer)
     
     # Comparative analysis
     print("\n" + "=" * 60)
@@ -201,15 +392,14 @@ def generate_thematic_report(df):
 
 if __name__ == "__main__":
     # Load data with sentiment
-    df = pd.read_csv('data/processed/reviews_with_sentiment.csv')
+    df = pd.read_parquet('data/processed/reviews_with_sentiment.parquet')
     
-    # Generate thematic report
+    # Generate thematic report (adds the themes column to df)
     bank_themes = generate_thematic_report(df)
-    
+
     # Save results with themes
-    analyzer = ThematicAnalyzer()
-    df['themes'] = df['review_text'].apply(analyzer.categorize_review_themes)
-    df.to_csv('data/processed/reviews_with_sentiment_themes.csv', index=False)
+    output_path = 'data/processed/reviews_with_sentiment_themes.parquet'
+    df.to_parquet(output_path, compression='zstd', index=False)
     
-    print(f"\n💾 Results saved to: data/processed/reviews_with_sentiment_themes.csv")
+    print(f"\n💾 Results saved to: {output_path}")
     print(f"\n✅ Thematic analysis completed! Ready for database storage and visualization.")
\ No newline at end of file
@@ -1,9 +1,11 @@
 # scripts/visualizations.py
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless raster backend: no GUI probe, no blocking show
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from wordcloud import WordCloud
+from wordcloud import WordCloud, STOPWORDS
 import sys
 import os
 
@@ -16,8 +18,12 @@ sns.set_palette("husl")
 class BankVisualizations:
     def __init__(self):
         # Load data directly from database or CSV
-        self.data_file = 'data/processed/reviews_with_sentiment_themes.csv'
-        self.df = pd.read_csv(self.data_file)
+        self.data_file = 'data/processed/reviews_with_sentiment_themes.parquet'
+        self.df = pd.read_parquet(self.data_file)
+        
+        # Cheap no-op when the parquet input already carries category dtypes
+        self.df['bank'] = self.df['bank'].astype('category')
+        self.df['sentiment_label'] = self.df['sentiment_label'].astype('category')
         
         # Bank color mapping
         self.bank_colors = {
@@ -31,7 +37,7 @@ class BankVisualizations:
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
         
         # Subplot 1: Sentiment distribution
-        sentiment_counts = self.df.groupby(['bank', 'sentiment_label']).size().unstack()
+        sentiment_counts = self.df.groupby(['bank', 'sentiment_label'], observed=True).size().unstack()
         sentiment_counts.plot(kind='bar', ax=ax1, color=['#FF6B6B', '#4ECDC4'])
         ax1.set_title('Sentiment Distribution by Bank', fontsize=14, fontweight='bold')
         ax1.set_xlabel('Bank', fontsize=12)
@@ -40,7 +46,7 @@ class BankVisualizations:
         ax1.tick_params(axis='x', rotation=45)
         
         # Subplot 2: Average rating comparison
-        avg_rating = self.df.groupby('bank')['rating'].mean().sort_values(ascending=False)
+        avg_rating = self.df.groupby('bank', observed=True)['rating'].mean().sort_values(ascending=False)
         bars = ax2.bar(avg_rating.index, avg_rating.values, 
                        color=[self.bank_colors[b] for b in avg_rating.index])
         ax2.set_title('Average Star Rating by Bank', fontsize=14, fontweight='bold')
@@ -55,8 +61,8 @@ class BankVisualizations:
                     f'{height:.2f}', ha='center', va='bottom', fontweight='bold')
         
         plt.tight_layout()
-        plt.savefig('visualizations/sentiment_comparison.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig('visualizations/sentiment_comparison.png', dpi=150, bbox_inches='tight')
+        plt.close('all')
         print("✅ Saved: sentiment_comparison.png")
     
     def plot_pain_points_analysis(self):
@@ -64,14 +70,12 @@ class BankVisualizations:
         # Extract themes from negative reviews
         negative_reviews = self.df[self.df['sentiment_label'] == 'NEGATIVE']
         
-        # Parse themes into list
-        negative_reviews['theme_list'] = negative_reviews['themes'].apply(
-            lambda x: [theme.strip() for theme in str(x).split(',') if theme.strip() != 'Other']
-        )
-        
-        # Explode themes into separate rows
-        exploded = negative_reviews.explode('theme_list')
-        theme_counts = exploded.groupby(['bank', 'theme_list']).size().unstack(fill_value=0)
+        # Split and explode the theme strings inside pandas' C path
+        # instead of a Python lambda per row
+        themes_s = negative_reviews['themes'].str.split(',').explode().str.strip()
+        themes_s = themes_s[themes_s.ne('Other') & themes_s.ne('')]
+        banks = negative_reviews['bank'].reindex(themes_s.index)
+        theme_counts = themes_s.groupby(banks, observed=True).value_counts().unstack(fill_value=0)
         
         # Plot
         fig, axes = plt.subplots(1, 3, figsize=(18, 6))
@@ -94,8 +98,8 @@ class BankVisualizations:
         
         plt.suptitle('Top Pain Points by Bank (Negative Reviews)', fontsize=16, fontweight='bold', y=1.02)
         plt.tight_layout()
-        plt.savefig('visualizations/pain_points_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig('visualizations/pain_points_analysis.png', dpi=150, bbox_inches='tight')
+        plt.close('all')
         print("✅ Saved: pain_points_analysis.png")
     
     def plot_rating_distribution(self):
@@ -125,25 +129,35 @@ class BankVisualizations:
         
         plt.suptitle('Star Rating Distribution by Bank', fontsize=16, fontweight='bold', y=1.05)
         plt.tight_layout()
-        plt.savefig('visualizations/rating_distribution.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig('visualizations/rating_distribution.png', dpi=150, bbox_inches='tight')
+        plt.close('all')
         print("✅ Saved: rating_distribution.png")
     
     def create_word_clouds(self):
         """Plot 4: Word clouds for each bank"""
         fig, axes = plt.subplots(1, 3, figsize=(18, 6))
-        
+
+        # Join each (bank, sentiment) group once instead of re-masking the
+        # whole dataframe six times in the loop
+        texts = self.df.groupby(['bank', 'sentiment_label'], observed=True)['review_text'].agg(' '.join)
+
+        # One stopword set for all six clouds; the bank names themselves
+        # carry no signal in a per-bank cloud
+        stopwords = set(STOPWORDS) | {'app', 'bank', 'cbe', 'boa', 'dashen'}
+
         for idx, (bank, color) in enumerate(self.bank_colors.items()):
-            bank_reviews = self.df[self.df['bank'] == bank]
-            negative_text = ' '.join(bank_reviews[bank_reviews['sentiment_label'] == 'NEGATIVE']['review_text'])
-            positive_text = ' '.join(bank_reviews[bank_reviews['sentiment_label'] == 'POSITIVE']['review_text'])
-            
+            negative_text = texts.get((bank, 'NEGATIVE'), '')
+            positive_text = texts.get((bank, 'POSITIVE'), '')
+
             # Create word cloud
             wordcloud = WordCloud(
                 width=400, height=300,
                 background_color='white',
                 colormap='Reds' if bank == 'BOA' else ('Blues' if bank == 'CBE' else 'Oranges'),
                 max_words=50,
+                stopwords=stopwords,
+                collocations=False,
+                min_word_length=3,
                 contour_width=1,
                 contour_color='steelblue'
             ).generate(negative_text if len(negative_text) > 100 else positive_text)
@@ -154,21 +168,24 @@ class BankVisualizations:
         
         plt.suptitle('Word Cloud Analysis of Reviews', fontsize=16, fontweight='bold', y=1.02)
         plt.tight_layout()
-        plt.savefig('visualizations/word_clouds.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig('visualizations/word_clouds.png', dpi=150, bbox_inches='tight')
+        plt.close('all')
         print("✅ Saved: word_clouds.png")
     
     def plot_monthly_trends(self):
         """Plot 5: Monthly sentiment trends"""
-        # Convert date and extract month-year
-        self.df['review_date'] = pd.to_datetime(self.df['date'])
-        self.df['month_year'] = self.df['review_date'].dt.to_period('M')
-        
-        # Calculate monthly positive percentage
-        monthly_stats = self.df.groupby(['bank', 'month_year']).agg(
+        # date round-trips through parquet as datetime, so no re-parse
+        self.df['month_year'] = self.df['date'].dt.to_period('M')
+        
+        # Calculate monthly positive percentage. A precomputed int8 flag
+        # keeps the whole aggregation in pandas' Cython groupby — the old
+        # aggregation lambda forced a Python callback per group
+        self.df['is_positive'] = (self.df['sentiment_label'] == 'POSITIVE').astype('int8')
+        monthly_stats = self.df.groupby(['bank', 'month_year'], observed=True).agg(
             total_reviews=('review_id', 'count'),
-            positive_percentage=('sentiment_label', lambda x: (x == 'POSITIVE').mean() * 100)
+            positive_percentage=('is_positive', 'mean')
         ).reset_index()
+        monthly_stats['positive_percentage'] *= 100
         
         # Convert period to datetime for plotting
         monthly_stats['month_date'] = monthly_stats['month_year'].dt.to_timestamp()
@@ -191,8 +208,8 @@ class BankVisualizations:
         # Rotate x-axis labels for better readability
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.savefig('visualizations/monthly_trends.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig('visualizations/monthly_trends.png', dpi=150, bbox_inches='tight')
+        plt.close('all')
         print("✅ Saved: monthly_trends.png")
     
     def generate_all_visualizations(self):